@@ -5,6 +5,9 @@ Downloads full-resolution photos incrementally while scrolling
 
 Requirements:
     pip install selenium webdriver-manager
+    # set CHROMEDRIVER_PATH to use a chromedriver of your own instead
+    # or, for --engine playwright
+    pip install playwright && playwright install chromium
 
 Usage:
     # Download photos from "Photos by" tab (photos uploaded by the user)
@@ -19,28 +22,849 @@ Usage:
     # Limit number of photos or scroll iterations
     python selenium_photos_scraper.py --username "user.profile" --output ./photos --tab "by" --limit 50
     python selenium_photos_scraper.py --username "user.profile" --output ./photos --tab "by" --scrolls 300
+
+    # Drive the browser with Playwright's async API instead of Selenium
+    python selenium_photos_scraper.py --username "user.profile" --output ./photos --tab "by" --engine playwright
 """
 import argparse
+import asyncio
 import time
 import random
 import os
+import socket
 from pathlib import Path
-from urllib.parse import urljoin, urlparse, parse_qs
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import hashlib
+import itertools
+import json
+import sqlite3
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_for_futures
+
+# Photos are streamed to disk in chunks of this size instead of being buffered
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Chunks are gathered into writes of this size, so most photos take a write() or two
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Anything smaller than this is an error page rather than a photo
+MIN_PHOTO_BYTES = 1000
+# Images with fewer pixels than this (200x200) are thumbnails, not the photo itself
+MIN_PHOTO_AREA = 40000
+# How many photos can wait for each download worker before scrolling pauses
+QUEUED_PHOTOS_PER_WORKER = 8
+# Seconds after which a leftover temp download file is assumed abandoned
+STALE_DOWNLOAD_AGE = 3600
+# Name of the temp files downloads are written to (see save_photo), so that
+# the stale download cleanup never touches a file the scraper didn't write
+_TEMP_DOWNLOAD_RE = re.compile(r'^\.[0-9a-f]{32}\.part$')
+# Extension at the end of an image URL's path (before any query or fragment),
+# for the extensions that are kept. Anything else is saved as .jpg
+_PHOTO_EXTENSION_RE = re.compile(r'^[^?#]*(\.(?:jpe?g|png|gif|webp))(?:[?#]|$)', re.IGNORECASE)
+
+# Numeric photo id in the different URL forms Facebook links the same photo with:
+# /photo/?fbid=<id>&set=..., /<user>/photos/<id>/ and /<user>/photos/pcb.<post>/<id>/
+_PHOTO_ID_RE = re.compile(r'(?:fbid=|/photos/(?:pcb\.\d+/)?)(\d{8,})')
+
+# Chrome profile kept between runs, so the Facebook login survives the browser closing
+BROWSER_PROFILE_DIR = Path.home() / '.fb_scraper_profile'
+# Same for the Playwright engine, whose bundled Chromium may not read Chrome's profile
+PLAYWRIGHT_PROFILE_DIR = Path.home() / '.fb_scraper_playwright_profile'
+# Where the chromedriver path resolved by webdriver-manager is remembered between runs
+CHROMEDRIVER_PATH_CACHE = Path.home() / '.cache' / 'facebook-scraper' / 'chromedriver_path'
+# Chrome shared between runs with --shared-browser, reachable over CDP on this port
+SHARED_BROWSER_PORT = 9222
+
+# Links to individual photos (and albums) in the gallery grid
+_PHOTO_LINKS_SELECTOR = "a[href*='/photos/'], a[href*='/photo/'], a[href*='fbid=']"
+# The gallery links each photo from both its thumbnail and its caption, so hrefs
+# are deduped in the page before being sent back to the driver
+_LINK_HREFS_JS = (
+    "return Array.from(new Set(Array.from(document.querySelectorAll(arguments[0]), a => a.href)));"
+)
+# Links to individual photos, leaving out the album links that show up in the
+# gallery next to them
+_PHOTO_LINK_RE = re.compile(r'^(?!.*/photos/(?:a\.|albums/)).*(?:/photos?/|fbid=)')
+
+# Image objects embedded in the JSON payload of a photo page, captured without
+# their braces. Besides the photo itself these include thumbnails and avatars.
+_IMAGE_OBJECT_RE = re.compile(
+    r'"image":\{([^{}]*"uri":"[^"]+scontent[^"]+\.(?:jpg|png|webp)[^"]*"[^{}]*)\}'
+)
+
+# Where the full-resolution image can be on a photo page, most specific first
+_FULL_IMAGE_SELECTORS = [
+    "img[data-visualcompletion='media-vc-image']",
+    "img.x1ey2m1c",  # Common class for full-size images
+    "img[style*='max-height']",
+    "div[role='dialog'] img",  # Image in photo viewer dialog
+    "div[data-pagelet*='MediaViewer'] img",
+]
+
+# Helpers shared by the image scripts below. findLargestImage returns {src, w, h}
+# of the largest decoded image matched by the first of the selectors that has one
+# bigger than minArea pixels, or null. naturalWidth/Height are the real pixel size,
+# and 0 until the image is loaded. pollLargestImage retries it every 100 ms, for up
+# to 8 s, and passes the result to done.
+_IMAGE_HELPERS_JS = """
+function findLargestImage(selectors, minArea) {
+    for (const selector of selectors) {
+        let best = null;
+        for (const img of document.querySelectorAll(selector)) {
+            const area = img.complete ? img.naturalWidth * img.naturalHeight : 0;
+            if (area > minArea && (!best || area > best.w * best.h)) {
+                best = {src: img.src, w: img.naturalWidth, h: img.naturalHeight};
+            }
+        }
+        if (best) {
+            return best;
+        }
+    }
+    return null;
+}
+function pollLargestImage(selectors, minArea, done) {
+    const deadline = Date.now() + 8000;
+    (function poll() {
+        const best = findLargestImage(selectors, minArea);
+        if (best || Date.now() > deadline) {
+            done(best);
+        } else {
+            setTimeout(poll, 100);
+        }
+    })();
+}
+"""
+
+# Waits for the largest image of a photo page (see findLargestImage, with the
+# selectors in arguments[0] and minimum area in arguments[1])
+_LARGEST_IMAGE_JS = _IMAGE_HELPERS_JS + """
+const [selectors, minArea] = arguments;
+pollLargestImage(selectors, minArea, arguments[arguments.length - 1]);
+"""
+
+# Clicks the gallery link of a photo (arguments[0]) so it opens in the in-page
+# viewer, then waits until the viewer shows an image bigger than arguments[1]
+# pixels. Resolves to {src, w, h} or null.
+_OPEN_IN_VIEWER_JS = _IMAGE_HELPERS_JS + """
+const [url, minArea] = arguments;
+const done = arguments[arguments.length - 1];
+const link = Array.from(document.querySelectorAll('a[href]')).find(a => a.href === url);
+if (!link) {
+    done(null);
+    return;
+}
+link.click();
+pollLargestImage(["div[role='dialog'] img"], minArea, done);
+"""
+
+# Scrolls the gallery arguments[1] times by arguments[2] pixels. After each step it
+# moves on as soon as more links matching arguments[0] show up, polling every 100 ms,
+# or after a second without any. Resolves with how many links were added overall.
+_SCROLL_FOR_LINKS_JS = """
+const [selector, steps, increment] = arguments;
+const done = arguments[arguments.length - 1];
+const count = () => document.querySelectorAll(selector).length;
+const initial = count();
+let step = 0;
+const scrollStep = () => {
+    if (step++ === steps) {
+        done(count() - initial);
+        return;
+    }
+    const before = count();
+    const started = Date.now();
+    window.scrollBy(0, increment);
+    const poll = setInterval(() => {
+        if (count() > before || Date.now() - started >= 1000) {
+            clearInterval(poll);
+            scrollStep();
+        }
+    }, 100);
+};
+scrollStep();
+"""
+
+# Resolves as soon as the DOM has stopped changing for 600 ms, i.e. once whatever a
+# scroll triggered has been rendered. Gives up after 3 s without any change, and
+# after 10 s in total for pages that never stop mutating.
+_WAIT_FOR_DOM_SETTLED_JS = """
+const done = arguments[arguments.length - 1];
+let finished = false;
+const finish = () => {
+    if (!finished) {
+        finished = true;
+        observer.disconnect();
+        done();
+    }
+};
+const observer = new MutationObserver(() => {
+    clearTimeout(quiet);
+    quiet = setTimeout(finish, 600);
+});
+let quiet = setTimeout(finish, 3000);
+setTimeout(finish, 10000);
+observer.observe(document.body, {childList: true, subtree: true});
+"""
+
+_CLOSE_VIEWER_JS = (
+    "document.body.dispatchEvent(new KeyboardEvent('keydown', {key: 'Escape', bubbles: true}));"
+)
+
+
+class PhotoIndex:
+    """
+    Content hashes of the photos in the output folder, shared between threads
+
+    Hashes are kept in a SQLite database in the output folder along with the
+    size and mtime of the file they were computed from. Later runs only hash
+    the files that are new or changed since, instead of trusting filenames.
+    Photos deleted from the folder stay in the index, so they aren't
+    downloaded again.
+
+    Photos downloaded by the scraper also record a quick hash, of their size
+    and first chunk, which is enough to recognize a duplicate before the rest
+    of it is downloaded.
+
+    The same database records the ids of the photos processed so far, which
+    --resume skips.
+    """
+
+    DB_NAME = '.state.sqlite'
+    # Files written by earlier versions: the hash database before it also held
+    # the processed ids, and a hash list that is imported into it once
+    OLD_DB_NAME = '.hashes.sqlite'
+    MANIFEST_NAME = '.manifest'
+
+    def __init__(self, output_folder):
+        self.lock = threading.Lock()
+        self.quick_hashes = {}
+        self.hashes = set()
+        db_path = output_folder / self.DB_NAME
+        if not db_path.exists() and (output_folder / self.OLD_DB_NAME).exists():
+            os.replace(output_folder / self.OLD_DB_NAME, db_path)
+        # Writes all happen under self.lock, so the connection can be shared
+        self._db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS photos"
+            " (hash TEXT PRIMARY KEY, quick_hash TEXT, name TEXT, size INTEGER, mtime REAL)"
+        )
+        # Ids are ints, or the URL of photos whose id couldn't be parsed
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (photo_key PRIMARY KEY)")
+
+        # Commit the import and scan below at once, rather than row by row
+        self._db.execute("BEGIN")
+        manifest_path = output_folder / self.MANIFEST_NAME
+        if manifest_path.exists():
+            # Each line holds a content hash, followed by its quick hash if known
+            for line in manifest_path.read_text().splitlines():
+                content_hash, _, quick_hash = line.partition(' ')
+                self._db.execute(
+                    "INSERT OR IGNORE INTO photos (hash, quick_hash) VALUES (?, ?)",
+                    (content_hash, quick_hash or None),
+                )
+
+        indexed = {}
+        for content_hash, quick_hash, name, size, mtime in self._db.execute("SELECT * FROM photos"):
+            self.hashes.add(self._key(content_hash))
+            if quick_hash:
+                self.quick_hashes[self._key(quick_hash)] = content_hash
+            if name:
+                indexed[name] = (size, mtime)
+
+        with os.scandir(output_folder) as entries:
+            for entry in entries:
+                if _TEMP_DOWNLOAD_RE.match(entry.name):
+                    self._remove_stale_download(entry)
+                    continue
+                # Checked against the dirent type, so only photos are ever stat()ed
+                if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if indexed.get(entry.name) != (stat.st_size, stat.st_mtime):
+                    self.add(*self._hash_file(entry.path, stat.st_size), filepath=entry.path)
+        self._db.execute("COMMIT")
+        manifest_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _key(content_hash):
+        # Hex digests are kept as ints, about half the size of the equivalent string.
+        # Manifests of earlier versions may hold names that aren't a hash.
+        try:
+            return int(content_hash, 16)
+        except ValueError:
+            return content_hash
+
+    @staticmethod
+    def _remove_stale_download(entry):
+        # Downloads are renamed into place once complete, so a temp file left
+        # behind is from a run that was killed mid-download. Recent ones may
+        # belong to another run still writing to this folder.
+        try:
+            if time.time() - entry.stat(follow_symlinks=False).st_mtime > STALE_DOWNLOAD_AGE:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _hash_file(path, size):
+        # Files also get a quick hash, so downloads of photos that were put in
+        # the folder some other way are recognized from their first chunk too
+        hasher = content_hasher()
+        with open(path, 'rb') as f:
+            first_chunk = f.read(DOWNLOAD_CHUNK_SIZE)
+            hasher.update(first_chunk)
+            while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                hasher.update(chunk)
+        return hasher.hexdigest(), quick_content_hash(size, first_chunk)
+
+    def __contains__(self, content_hash):
+        return self._key(content_hash) in self.hashes
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def find_quick(self, quick_hash):
+        """Return the content hash of the photo with this quick hash, if there is one"""
+        return self.quick_hashes.get(self._key(quick_hash))
+
+    def add(self, content_hash, quick_hash=None, filepath=None):
+        """Record a hash, and the file it was computed from if it's in the folder"""
+        self.hashes.add(self._key(content_hash))
+        if quick_hash:
+            self.quick_hashes[self._key(quick_hash)] = content_hash
+        name = size = mtime = None
+        if filepath:
+            stat = os.stat(filepath)
+            name, size, mtime = os.path.basename(filepath), stat.st_size, stat.st_mtime
+            # The file may have held another photo before it changed
+            self._db.execute(
+                "UPDATE photos SET name = NULL WHERE name = ? AND hash != ?", (name, content_hash)
+            )
+        self._db.execute(
+            "INSERT INTO photos VALUES (?, ?, ?, ?, ?) ON CONFLICT (hash) DO UPDATE SET"
+            " quick_hash = coalesce(excluded.quick_hash, quick_hash),"
+            " name = coalesce(excluded.name, name),"
+            " size = coalesce(excluded.size, size),"
+            " mtime = coalesce(excluded.mtime, mtime)",
+            (content_hash, quick_hash, name, size, mtime),
+        )
+
+    def seen_ids(self):
+        """Return the ids of the photos processed in previous runs"""
+        with self.lock:
+            return [key for key, in self._db.execute("SELECT photo_key FROM seen")]
+
+    def add_seen(self, photo_keys):
+        """Record processed photo ids, committed together"""
+        with self.lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO seen VALUES (?)", ((key,) for key in photo_keys)
+            )
+            self._db.execute("COMMIT")
+
+    def close(self):
+        self._db.close()
+
+
+def widen_driver_connection_pool(driver, maxsize=16):
+    """
+    Let the driver keep several connections open to chromedriver
+
+    Selenium's urllib3 pool holds a single connection by default, so commands
+    issued while another one is in flight wait for it (and log "connection pool
+    is full" warnings). webdriver.Chrome doesn't take a ClientConfig in the
+    Selenium version we pin, so the pool is rebuilt from the driver's config.
+    """
+    executor = driver.command_executor
+    executor._client_config.init_args_for_pool_manager = {
+        'init_args_for_pool_manager': {'maxsize': maxsize}
+    }
+    if hasattr(executor, '_conn'):
+        executor._conn.clear()
+        executor._conn = executor._get_connection_manager()
+
+
+def find_chromedriver(refresh=False):
+    """
+    Return the path of the chromedriver binary to use, and whether it was cached
+
+    CHROMEDRIVER_PATH wins if set. Otherwise the path webdriver-manager resolved
+    on a previous run is reused, since resolving it checks the latest driver
+    version online every time. Pass refresh=True once that driver no longer
+    matches the installed Chrome.
+    """
+    if os.environ.get('CHROMEDRIVER_PATH'):
+        return os.environ['CHROMEDRIVER_PATH'], False
+    if not refresh and CHROMEDRIVER_PATH_CACHE.exists():
+        path = CHROMEDRIVER_PATH_CACHE.read_text().strip()
+        if os.path.exists(path):
+            return path, True
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    CHROMEDRIVER_PATH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    CHROMEDRIVER_PATH_CACHE.write_text(path)
+    return path, False
+
+
+def create_download_session(user_agent=None):
+    """
+    Create a requests session shared by every photo download
+
+    Photos are served from a handful of fbcdn.net hosts, so a pooled session
+    keeps connections alive between downloads instead of paying a new TCP+TLS
+    handshake per photo. Transient CDN errors are retried with backoff.
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retries))
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    # Defaults for the image downloads, photo page requests override Accept
+    session.headers.update({
+        'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+        'Referer': 'https://www.facebook.com/',
+    })
+    return session
+
+
+def is_port_open(port, host='127.0.0.1'):
+    """Check whether something is listening on a local TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)
+        return sock.connect_ex((host, port)) == 0
+
+
+def photo_id(url):
+    """Return the numeric id of the photo a URL points to, or the URL itself if it has none"""
+    match = _PHOTO_ID_RE.search(url)
+    # Ids are kept as ints, which are smaller than strings and hash to themselves
+    return int(match.group(1)) if match else url
+
+
+def canonical_photo_url(fbid):
+    """Return the URL of the standalone page of a photo, from its id"""
+    return f"https://www.facebook.com/photo/?fbid={fbid}"
+
+
+def photo_extension(img_url):
+    """Return the file extension of an image URL, defaulting to .jpg"""
+    match = _PHOTO_EXTENSION_RE.match(img_url)
+    return match.group(1).lower() if match else '.jpg'
+
+
+def copy_browser_cookies(driver, session):
+    """Copy the cookies of the logged-in browser into the requests session"""
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/')
+        )
+
+
+def find_image_url(session, photo_url):
+    """
+    Fetch a photo page over HTTP and extract the full-size image URL from it
+
+    This skips rendering the page in the browser entirely. Returns None when the
+    page doesn't embed the image, e.g. when Facebook serves a login wall instead.
+    """
+    try:
+        response = session.get(photo_url, timeout=15, headers={'Accept': 'text/html'})
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+
+    return largest_image_uri(response.text)
+
+
+def largest_image_uri(html):
+    """Return the URI of the largest image embedded in a photo page's JSON, or None"""
+    best_uri = None
+    best_area = -1
+    for match in _IMAGE_OBJECT_RE.finditer(html):
+        try:
+            image = json.loads(f'{{{match.group(1)}}}')
+        except ValueError:
+            continue
+        area = (image.get('width') or 0) * (image.get('height') or 0)
+        if area > best_area:
+            best_uri, best_area = image['uri'], area
+    return best_uri
+
+
+def content_hasher(data=b''):
+    """
+    Return a new hash object for naming photos after their content
+
+    BLAKE2b is in the standard library and hashes faster than MD5 on 64-bit
+    CPUs. A 16-byte digest keeps names the same length as the MD5 ones.
+    """
+    return hashlib.blake2b(data, digest_size=16)
+
+
+def quick_content_hash(size, first_chunk):
+    """Hash a photo's size and first chunk, enough to tell it apart from other photos"""
+    return content_hasher(f"{size}:".encode() + first_chunk).hexdigest()
+
+
+def download_photo(session, img_url, output_folder, existing_hashes, use_quick_hash=True):
+    """
+    Stream a photo to disk, naming it after the hash of its content
+
+    The body is hashed while it is written to a hidden temporary file, so the
+    image is never held in memory. The file is then renamed to its content hash,
+    or discarded if it turns out to be a duplicate or too small to be a photo.
+    existing_hashes is the PhotoIndex shared between worker threads.
+
+    Before that, a quick hash of the size and first chunk is looked up in the
+    index. A match is only a likely duplicate, so the rest of the body is then
+    hashed without being written, and the photo is dropped if the full hash
+    matches too. That saves the disk write, not the download. On the rare
+    mismatch the photo is fetched again, with use_quick_hash off, and saved.
+
+    Returns:
+        A (status, filename, size) tuple. status is one of "downloaded",
+        "duplicate", "too_small" or "http_error", in which case size is the
+        HTTP status code.
+    """
+    with session.get(img_url, timeout=30, stream=True) as response:
+        if response.status_code != 200:
+            return 'http_error', None, response.status_code
+
+        ext = photo_extension(img_url)
+        chunks = response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+        first_chunk = next(chunks, b'')
+
+        quick_hash = None
+        content_length = response.headers.get('Content-Length')
+        # The length is only that of the image itself when the body isn't compressed
+        if use_quick_hash and content_length and 'Content-Encoding' not in response.headers:
+            quick_hash = quick_content_hash(content_length, first_chunk)
+            known_hash = existing_hashes.find_quick(quick_hash)
+            if known_hash:
+                hasher = content_hasher(first_chunk)
+                for chunk in chunks:
+                    hasher.update(chunk)
+                if hasher.hexdigest() == known_hash:
+                    return 'duplicate', f"{known_hash}{ext}", int(content_length)
+                # Only the size and first chunk matched, and the body is used up
+                return download_photo(
+                    session, img_url, output_folder, existing_hashes, use_quick_hash=False
+                )
+
+        return save_photo(
+            itertools.chain((first_chunk,), chunks), ext, output_folder, existing_hashes, quick_hash
+        )
+
+
+def save_photo(chunks, ext, output_folder, existing_hashes, quick_hash=None):
+    """
+    Write a photo's content to disk, named after its hash, unless it's a duplicate
+
+    chunks is an iterable of the photo's bytes, hashed as they are written.
+    Returns a (status, filename, size) tuple like download_photo.
+    """
+    hasher = content_hasher()
+    file_size = 0
+    # Written under a temp name and renamed once complete, so an interrupted
+    # download never leaves a truncated photo under its final name
+    tmp_path = output_folder / f".{uuid.uuid4().hex}.part"
+    try:
+        with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            for chunk in chunks:
+                hasher.update(chunk)
+                f.write(chunk)
+                file_size += len(chunk)
+
+        content_hash = hasher.hexdigest()
+        filename = f"{content_hash}{ext}"
+        filepath = output_folder / filename
+
+        with existing_hashes.lock:
+            # Check if hash already exists
+            if content_hash in existing_hashes:
+                return 'duplicate', filename, file_size
+
+            if file_size < MIN_PHOTO_BYTES:
+                return 'too_small', filename, file_size
+
+            try:
+                # Claim the name with an exclusive create rather than checking whether
+                # it exists first, so nothing can take it between the check and the write
+                open(filepath, 'xb').close()
+            except FileExistsError:
+                existing_hashes.add(content_hash, quick_hash)
+                return 'duplicate', filename, file_size
+
+            tmp_path.replace(filepath)
+            existing_hashes.add(content_hash, quick_hash, filepath)
+        return 'downloaded', filename, file_size
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def fetch_photo(session, photo_url, output_folder, existing_hashes):
+    """
+    Find and download a photo over HTTP only, so it can run in a worker thread
+
+    Returns the same (status, filename, size) tuple as download_photo, with the
+    extra statuses "not_found" when the photo page doesn't embed the image and
+    "error" (size holds the exception) when the request fails.
+    """
+    # Small random delay so parallel workers don't hit Facebook in lockstep
+    time.sleep(random.uniform(0.2, 0.6))
+    try:
+        img_url = find_image_url(session, photo_url)
+        fbid = photo_id(photo_url)
+        if not img_url and isinstance(fbid, int) and photo_url != canonical_photo_url(fbid):
+            # Some of the URL forms used in galleries serve a page without the
+            # image, the canonical photo page of its id may still embed it
+            img_url = find_image_url(session, canonical_photo_url(fbid))
+        if not img_url:
+            return 'not_found', None, 0
+        return download_photo(session, img_url, output_folder, existing_hashes)
+    except Exception as e:
+        return 'error', None, e
+
+
+def fetch_found_photo(session, img_url, output_folder, existing_hashes):
+    """
+    Download a photo whose image URL was found in the browser, in a worker thread
+
+    Like fetch_photo, a failed request is returned with the "error" status
+    instead of raised, so it can't end the scrape.
+    """
+    try:
+        return download_photo(session, img_url, output_folder, existing_hashes)
+    except Exception as e:
+        return 'error', None, e
+
+
+class ScrapeProgress:
+    """
+    Download counters of a run, and which photos it has processed
+
+    Ids of downloaded (or already present) photos are recorded in the photo
+    index's database, so --resume doesn't revisit them, and looked up in a
+    set while running. Failed photos are only remembered for the current run,
+    and retried on the next one.
+    """
+
+    def __init__(self, index, resume=False):
+        self.downloaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.failed_ids = set()  # Photos that failed in this session, not retried until the next run
+
+        # Ids of photos already processed, kept between runs so --resume doesn't revisit them
+        self.index = index
+        self.seen_ids = set(index.seen_ids()) if resume else set()
+        self._unsaved_ids = []
+        if self.seen_ids:
+            print(f"   Skipping {len(self.seen_ids)} photo pages processed in previous runs")
+
+    def limit_reached(self, limit):
+        return bool(limit) and self.downloaded >= limit
+
+    def report(self, photo_key, status, filename, file_size):
+        """Print the outcome of a photo download and update the stats"""
+        if status == 'duplicate':
+            print(f"    ⏭️  Already exists (duplicate content): {filename}")
+            self.skipped += 1
+        elif status == 'http_error':
+            self.fail(photo_key, f"Failed: HTTP {file_size}")
+            return
+        elif status == 'too_small':
+            print(f"    ⚠️  File too small ({file_size} bytes), might be invalid")
+            self.fail(photo_key)
+            return
+        elif status == 'error':
+            self.fail(photo_key, f"Error: {file_size}")
+            return
+        else:
+            print(f"    ✅ Downloaded ({file_size:,} bytes)")
+            print(f"       Hash: {Path(filename).stem}")
+            self.downloaded += 1
+        # Only remember photos for later runs once they are safely on disk
+        self.seen_ids.add(photo_key)
+        self._unsaved_ids.append(photo_key)
+
+    def fail(self, photo_key, message=None):
+        if message:
+            print(f"    ❌ {message}")
+        self.failed += 1
+        self.failed_ids.add(photo_key)
+
+    def save(self):
+        self.index.add_seen(self._unsaved_ids)
+        self._unsaved_ids.clear()
+
+
+class DownloadQueue:
+    """
+    Photos waiting for, or being fetched by, the download workers
+
+    Photos are only handed to the thread pool while the ones in flight can't
+    push the run past its download limit, so the limit is never overshot.
+    Once maxsize photos are queued, the queue reports itself backlogged and the
+    scroll loop waits for the workers instead of discovering more photos.
+    """
+
+    def __init__(
+        self, executor, session, output_folder, existing_hashes, progress, limit=None, maxsize=None
+    ):
+        self.executor = executor
+        self.session = session
+        self.output_folder = output_folder
+        self.existing_hashes = existing_hashes
+        self.progress = progress
+        self.limit = limit
+        self.maxsize = maxsize
+        self.pending = deque()  # (id, url) of photos waiting for a worker
+        self.in_flight = {}  # Future of each photo being fetched by a worker -> (id, url)
+        self.queued_ids = set()  # Ids of the photos in pending and in_flight
+
+    def __len__(self):
+        return len(self.pending) + len(self.in_flight)
+
+    def new_photos(self, current_photos):
+        """Return (id, url) of the photos on the page that weren't processed or queued yet"""
+        # Kept in gallery order, so --limit downloads the first photos of the gallery
+        return [
+            (key, url) for key, url in current_photos.items()
+            if key not in self.queued_ids
+            and key not in self.progress.failed_ids
+            and key not in self.progress.seen_ids
+        ]
+
+    def add(self, photos):
+        self.pending.extend(photos)
+        self.queued_ids.update(key for key, _ in photos)
+
+    def backlogged(self):
+        """Whether the workers have more photos queued than maxsize, and some in progress"""
+        return bool(self.maxsize) and len(self) >= self.maxsize and bool(self.in_flight)
+
+    def full(self):
+        """Whether the photos in flight would be enough to reach the download limit"""
+        return bool(self.limit) and self.progress.downloaded + len(self.in_flight) >= self.limit
+
+    def download(self, photo, img_url):
+        """
+        Hand a photo whose image URL is already known straight to the workers
+
+        Used for the photos found in the browser, so their download doesn't hold
+        up the browser while it moves on to the next one.
+        """
+        future = self.executor.submit(
+            fetch_found_photo, self.session, img_url, self.output_folder, self.existing_hashes
+        )
+        self.in_flight[future] = photo
+        self.queued_ids.add(photo[0])
+
+    def submit(self):
+        """Hand queued photos to the workers, never more than what's left of the limit"""
+        while self.pending and not self.full():
+            photo = self.pending.popleft()
+            future = self.executor.submit(
+                fetch_photo, self.session, photo[1], self.output_folder, self.existing_hashes
+            )
+            self.in_flight[future] = photo
+
+    def finished(self, timeout=0, first=False):
+        """
+        Return ((id, url), result) for each photo the workers have finished
+
+        Waits up to timeout seconds (without limit when None) for all the photos
+        in flight to finish, or only for the first one when first is True.
+        """
+        done, _ = wait_for_futures(
+            list(self.in_flight),
+            timeout=timeout,
+            return_when=FIRST_COMPLETED if first else ALL_COMPLETED,
+        )
+        results = []
+        for future in done:
+            photo = self.in_flight.pop(future)
+            self.queued_ids.discard(photo[0])
+            results.append((photo, future.result()))
+        return results
+
+
+def gallery_url(username, tab):
+    """Return the URL of one of the photo tabs of a profile"""
+    # Navigate to appropriate photos tab
+    if tab.lower() == "by":
+        # Photos uploaded by the user
+        print(f"Navigating to 'Photos by {username}' (uploads)...")
+        return f"https://www.facebook.com/{username}/photos_all"
+    elif tab.lower() == "of":
+        # Photos user is tagged in
+        print(f"Navigating to 'Photos of {username}'...")
+        return f"https://www.facebook.com/{username}/photos_of"
+    else:
+        print(f"Invalid tab option: {tab}. Using 'by' as default.")
+        return f"https://www.facebook.com/{username}/photos"
+
+
+def find_photo_links(hrefs):
+    """
+    Map the id of every photo linked from the gallery to its URL
+
+    The same photo shows up under several URL forms, so links are deduped on
+    the photo id, keeping the first URL seen for it, in page order.
+    """
+    current_photos = {}
+    for href in hrefs:
+        if href and _PHOTO_LINK_RE.match(href):
+            current_photos.setdefault(photo_id(href), href)
+    return current_photos
 
-def scrape_photos_selenium(username, output_folder, tab="by", max_scrolls=300, limit=None, resume=False):
+
+def _playwright_function(script, is_async=False):
+    """
+    Wrap one of the Selenium script bodies above as a Playwright function
+
+    The scripts read their parameters from `arguments`, and async ones call the
+    last argument once done. Playwright passes a single argument and awaits a
+    returned promise, so the body is applied to that argument list instead,
+    with the promise's resolve function appended for async scripts.
+    """
+    if is_async:
+        return (
+            "(args) => new Promise(resolve => "
+            f"(function() {{ {script} }}).apply(null, [...args, resolve]))"
+        )
+    return f"(args) => (function() {{ {script} }}).apply(null, args)"
+
+
+def scrape_photos_selenium(
+    username,
+    output_folder,
+    tab="by",
+    max_scrolls=300,
+    limit=None,
+    resume=False,
+    workers=6,
+    shared_browser=False,
+):
     """
     Scrape full-resolution photos using Selenium from desktop Facebook
 
     This version scrolls slowly and downloads photos incrementally:
     1. Scroll a little bit
     2. Collect new photo URLs that appeared
-    3. Download those photos
+    3. Queue those photos for the download workers
     4. Repeat
 
-    This gives Facebook plenty of time to load content between scrolls.
+    Downloads run on a thread pool in the background, so they overlap with
+    the scrolling instead of holding it up. This still gives Facebook plenty
+    of time to load content between scrolls.
 
     Args:
         username: Facebook username/profile name
@@ -49,6 +873,8 @@ def scrape_photos_selenium(username, output_folder, tab="by", max_scrolls=300, l
         max_scrolls: How many scroll iterations (default: 300)
         limit: Maximum number of photos to download (None = no limit)
         resume: If True, skip photos that were already processed
+        workers: How many photos to fetch in parallel over HTTP (default: 6)
+        shared_browser: If True, share one Chrome (and its login) between concurrent runs
     """
     try:
         from selenium import webdriver
@@ -58,7 +884,7 @@ def scrape_photos_selenium(username, output_folder, tab="by", max_scrolls=300, l
         from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
         from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-        from webdriver_manager.chrome import ChromeDriverManager
+        from selenium.common.exceptions import SessionNotCreatedException
     except ImportError:
         print("ERROR: Please install required packages:")
         print("pip install selenium webdriver-manager")
@@ -67,96 +893,222 @@ def scrape_photos_selenium(username, output_folder, tab="by", max_scrolls=300, l
     output_folder = Path(output_folder)
     output_folder.mkdir(parents=True, exist_ok=True)
 
-    # Track stats
-    downloaded_count = 0
-    failed_count = 0
-    skipped_count = 0
-
     # Get existing hashes to check for duplicates
-    def get_existing_hashes():
-        """Get set of file hashes that are already downloaded"""
-        hashes = set()
-        for filepath in output_folder.glob('*'):
-            if filepath.is_file() and not filepath.name.startswith('.'):
-                # We assume the filename is the hash
-                hashes.add(filepath.stem)
-        return hashes
-
-    existing_hashes = get_existing_hashes()
+    existing_hashes = PhotoIndex(output_folder)
     if existing_hashes:
         print(f"📂 Found {len(existing_hashes)} existing photos in output folder")
         if resume:
             print(f"   Will skip these photos and continue downloading new ones")
 
+    # Track stats
+    progress = ScrapeProgress(existing_hashes, resume)
+
     # Setup Chrome driver
     options = webdriver.ChromeOptions()
-    # Remove headless mode so you can see what's happening and login manually
-    # options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--start-maximized')
-    
-    # Suppress noise and GCM errors
-    options.add_argument('--disable-background-networking')
-    options.add_argument('--disable-features=GCM')
-    options.add_argument('--log-level=3')
-    options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    if shared_browser and is_port_open(SHARED_BROWSER_PORT):
+        # Attach to the Chrome started by another run instead of launching a new one
+        print(f"Attaching to shared browser on port {SHARED_BROWSER_PORT}...")
+        options.add_experimental_option('debuggerAddress', f"127.0.0.1:{SHARED_BROWSER_PORT}")
+    else:
+        # Remove headless mode so you can see what's happening and login manually
+        # options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--start-maximized')
+
+        # Suppress noise and GCM errors
+        options.add_argument('--disable-background-networking')
+        options.add_argument('--disable-features=GCM')
+        options.add_argument('--log-level=3')
+        options.add_experimental_option('excludeSwitches', ['enable-logging'])
+
+        # Keep cookies in a persistent profile so later runs are already logged in
+        options.add_argument(f'--user-data-dir={BROWSER_PROFILE_DIR}')
+        options.add_argument('--profile-directory=Default')
+
+        if shared_browser:
+            # Expose the browser to later runs, and keep it open after this run
+            # ends since other runs may still be using it
+            options.add_argument(f'--remote-debugging-port={SHARED_BROWSER_PORT}')
+            options.add_experimental_option('detach', True)
+
+    chromedriver_path, cached = find_chromedriver()
+    try:
+        driver = webdriver.Chrome(service=Service(chromedriver_path), options=options)
+    except SessionNotCreatedException as e:
+        message = e.msg or ''
+        if 'user data directory is already in use' in message:
+            print(f"ERROR: The browser profile {BROWSER_PROFILE_DIR} is used by another run.")
+            print("Pass --shared-browser to all concurrent runs to share one Chrome between them.")
+            raise
+        # Any other failure isn't fixed by looking up another driver
+        if not cached or 'only supports Chrome version' not in message:
+            raise
+        # Chrome was updated since the cached driver was downloaded
+        print("Cached chromedriver doesn't match Chrome, looking up a new one...")
+        chromedriver_path, _ = find_chromedriver(refresh=True)
+        driver = webdriver.Chrome(service=Service(chromedriver_path), options=options)
+    widen_driver_connection_pool(driver)
+    if shared_browser:
+        # Work in our own tab so concurrent runs don't step on each other
+        driver.switch_to.new_window('tab')
+    gallery_handle = driver.current_window_handle
+    download_handle = None
     wait = WebDriverWait(driver, 10)
+    # Upper bound for async scripts such as waiting for the photo viewer
+    driver.set_script_timeout(15)
+
+    # One keep-alive session for all downloads, presenting the same user agent as the browser
+    session = create_download_session(driver.execute_script("return navigator.userAgent;"))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    queue = DownloadQueue(
+        executor, session, output_folder, existing_hashes, progress, limit,
+        maxsize=workers * QUEUED_PHOTOS_PER_WORKER,
+    )
 
     try:
         # Navigate to Facebook
         print("Opening Facebook...")
         driver.get("https://www.facebook.com")
 
-        # Wait for manual login
-        input("\n⚠️  Please log in to Facebook in the browser window, then press ENTER here to continue...\n")
-
-        # Navigate to appropriate photos tab
-        if tab.lower() == "by":
-            # Photos uploaded by the user
-            photos_url = f"https://www.facebook.com/{username}/photos_all"
-            print(f"Navigating to 'Photos by {username}' (uploads)...")
-        elif tab.lower() == "of":
-            # Photos user is tagged in
-            photos_url = f"https://www.facebook.com/{username}/photos_of"
-            print(f"Navigating to 'Photos of {username}'...")
+        # The c_user cookie is only set for a logged-in account, in which case the
+        # profile kept from a previous run is still logged in
+        if driver.get_cookie('c_user'):
+            print("✓ Already logged in from a previous session")
         else:
-            print(f"Invalid tab option: {tab}. Using 'by' as default.")
-            photos_url = f"https://www.facebook.com/{username}/photos"
+            # Wait for manual login
+            input("\n⚠️  Please log in to Facebook in the browser window, then press ENTER here to continue...\n")
+
+        # Hand the logged-in cookies over so photo pages can be fetched without the browser
+        copy_browser_cookies(driver, session)
 
-        driver.get(photos_url)
-        time.sleep(5)  # Give page time to load initially
+        driver.get(gallery_url(username, tab))
+        # Give page time to load initially, continuing as soon as the first photos show up
+        try:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, _PHOTO_LINKS_SELECTOR)))
+        except TimeoutException:
+            # Empty or private galleries have no photo links, the scroll loop reports that
+            pass
 
         # Store the main gallery window handle
         gallery_handle = driver.current_window_handle
-        
-        # Create a dedicated worker window for downloads
-        print("Opening secondary window for photo processing...")
-        driver.execute_script("window.open('about:blank', 'download_window', 'width=1000,height=800');")
-        # Identify handles
-        all_handles = driver.window_handles
-        download_handle = [h for h in all_handles if h != gallery_handle][0]
-        
-        # Switch back to gallery to start
-        driver.switch_to.window(gallery_handle)
+
+        def find_image_url_in_viewer(photo_url):
+            """Open a photo in the gallery's in-page viewer and return its image URL"""
+            driver.switch_to.window(gallery_handle)
+            gallery_page_url = driver.current_url
+            try:
+                result = driver.execute_async_script(_OPEN_IN_VIEWER_JS, photo_url, MIN_PHOTO_AREA)
+            finally:
+                # Close the viewer again, which keeps the gallery's scroll position
+                driver.execute_script(_CLOSE_VIEWER_JS)
+                try:
+                    WebDriverWait(driver, 2).until(EC.url_to_be(gallery_page_url))
+                except TimeoutException:
+                    # Escape didn't close the viewer. Going back in history restores the
+                    # gallery from the page cache, scroll position included, where
+                    # reloading it would start again from the top.
+                    driver.back()
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, _PHOTO_LINKS_SELECTOR)))
+
+            if not result or result['src'].startswith('data:'):
+                return None
+            return result['src']
+
+        def find_image_url_in_browser(photo_url):
+            """Open a photo in the download window and return the URL of its largest image"""
+            nonlocal download_handle
+            if download_handle is None:
+                # Most photos are found over HTTP or in the viewer, so the dedicated
+                # window is only opened once a photo actually needs it
+                print("    Opening secondary window for photo processing...")
+                driver.switch_to.new_window('window')
+                download_handle = driver.current_window_handle
+            else:
+                driver.switch_to.window(download_handle)
+            driver.get(photo_url)
+
+            # Wait for and find the largest image in a single driver call, instead of
+            # reading the size of every candidate image with separate get_attribute calls
+            largest = driver.execute_async_script(
+                _LARGEST_IMAGE_JS, _FULL_IMAGE_SELECTORS, MIN_PHOTO_AREA
+            )
+            if not largest or not largest['src'] or largest['src'].startswith('data:'):
+                return None
+            return largest['src']
+
+        def download_in_browser(photo_key, photo_url):
+            """Find a photo's image in the browser and download it, for photos the workers couldn't"""
+            try:
+                print(f"\n  Photo {photo_key}")
+                print(f"    🌐 Image not found in page HTML, opening in photo viewer...")
+                img_url = find_image_url_in_viewer(photo_url)
+                if not img_url:
+                    # The link may have been unloaded from the gallery by now
+                    print(f"    🌐 Not shown in viewer, opening in download window...")
+                    img_url = find_image_url_in_browser(photo_url)
+
+                if not img_url:
+                    progress.fail(photo_key, "Could not find full-size image")
+                    return
+
+                # The driver isn't thread-safe, but the download itself can run
+                # on a worker while the browser moves on to the next photo
+                print(f"    📥 Found image, queueing download...")
+                queue.download((photo_key, photo_url), img_url)
+            except Exception as e:
+                progress.fail(photo_key, f"Error: {e}")
+            finally:
+                # ALWAYS return focus to gallery window
+                try:
+                    driver.switch_to.window(gallery_handle)
+                except:
+                    pass
+
+        def collect_results(timeout=0, first=False):
+            """Report the photos the workers have finished, returning how many there were"""
+            results = queue.finished(timeout, first)
+            browser_photos = []
+            for (photo_key, photo_url), (status, filename, file_size) in results:
+                if status == 'not_found':
+                    browser_photos.append((photo_key, photo_url))
+                    continue
+                print(f"\n  Photo {photo_key}")
+                progress.report(photo_key, status, filename, file_size)
+
+            # Photos whose page HTML didn't embed the image are opened in the
+            # browser one at a time, since the driver can't be shared between threads.
+            # Clicking them in the gallery shows them without any page navigation.
+            for photo_key, photo_url in browser_photos:
+                # Check limit again, counting the downloads still in flight.
+                # Photos left out aren't marked, so they are picked up again
+                # if the limit isn't reached after all.
+                if queue.full():
+                    break
+                download_in_browser(photo_key, photo_url)
+
+            if results:
+                progress.save()
+            return len(results)
 
         print(f"\n{'='*70}")
         print(f"Starting incremental scroll & download process")
-        print(f"Strategy: Main window stays on gallery, secondary window downloads photos")
+        print(f"Strategy: Photos are fetched over HTTP, the browser only opens those that can't be")
         print(f"Max iterations: {max_scrolls}")
         print(f"{'='*70}\n")
 
+        # The window is maximized, so the viewport height doesn't change between scrolls
+        viewport_height = driver.execute_script("return window.innerHeight;")
+        scroll_increment = int(viewport_height * 0.5)  # Scroll 50% of viewport (slower)
+
         no_new_photos_count = 0
         total_photos_found = 0
         scroll_iteration = 0
-        processed_urls = set()  # Track URLs we've checked in this session
 
         for scroll_iteration in range(max_scrolls):
             # Check if we've hit the limit
-            if limit and downloaded_count >= limit:
+            if progress.limit_reached(limit):
                 print(f"\n✓ Reached download limit of {limit} photos")
                 break
 
@@ -164,175 +1116,24 @@ def scrape_photos_selenium(username, output_folder, tab="by", max_scrolls=300, l
             print(f"Scroll iteration {scroll_iteration + 1}/{max_scrolls}")
             print(f"{'─'*70}")
 
-            # Find all photo links currently visible on page
-            selectors = [
-                "a[href*='/photos/']",
-                "a[href*='/photo/']",
-                "a[href*='fbid=']",
-            ]
-
-            current_photo_links = []
-            for selector in selectors:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for elem in elements:
-                    try:
-                        href = elem.get_attribute('href')
-                        if href and ('/photos/' in href or '/photo/' in href or 'fbid=' in href):
-                            # Skip album links, only get individual photos
-                            if '/photos/a.' not in href and '/photos/albums/' not in href:
-                                current_photo_links.append(href)
-                    except:
-                        continue
-
-            # Remove duplicates while preserving order
-            current_photo_links = list(dict.fromkeys(current_photo_links))
+            # Read the hrefs of all photo links currently on the page in a single
+            # driver call, rather than one get_attribute round trip per link
+            hrefs = driver.execute_script(_LINK_HREFS_JS, _PHOTO_LINKS_SELECTOR)
+            current_photos = find_photo_links(hrefs)
 
-            # Filter out already processed photos in this session
-            new_photos = [url for url in current_photo_links if url not in processed_urls]
+            # Filter out already processed or queued photos
+            new_photos = queue.new_photos(current_photos)
 
-            photos_on_page = len(current_photo_links)
+            photos_on_page = len(current_photos)
             new_photos_count = len(new_photos)
 
             print(f"Photos visible on page: {photos_on_page}")
             print(f"New photos to check: {new_photos_count}")
 
-            # Download new photos before scrolling more
             if new_photos:
-                print(f"\n📥 Checking {new_photos_count} new photos...")
+                print(f"\n📥 Queueing {new_photos_count} new photos for download...")
                 no_new_photos_count = 0  # Reset counter when we find new photos
-
-                for idx, photo_url in enumerate(new_photos, 1):
-                    # Mark as processed
-                    processed_urls.add(photo_url)
-
-                    # Check limit again
-                    if limit and downloaded_count >= limit:
-                        print(f"\n✓ Reached download limit of {limit} photos")
-                        break
-
-                    try:
-                        # If we can extract an ID from URL, we can still skip BEFORE visiting if we've seen it 
-                        # but since we're using hashes for filenames now, we'll mainly rely on content hash.
-                        # However, to save time, let's keep a session-based skip if the URL is identical.
-                        # (processed_urls already handles this)
-
-                        print(f"\n  [{idx}/{new_photos_count}] Processing photo...")
-
-                        # Switch to download window and load photo
-                        driver.switch_to.window(download_handle)
-                        driver.get(photo_url)
-                        time.sleep(random.uniform(2, 4))
-
-                        # Try to find the full-resolution image
-                        img_selectors = [
-                            "img[data-visualcompletion='media-vc-image']",
-                            "img.x1ey2m1c",  # Common class for full-size images
-                            "img[style*='max-height']",
-                            "div[role='dialog'] img",  # Image in photo viewer dialog
-                            "div[data-pagelet*='MediaViewer'] img",
-                        ]
-
-                        full_img = None
-                        for selector in img_selectors:
-                            try:
-                                imgs = driver.find_elements(By.CSS_SELECTOR, selector)
-                                # Get the largest image (by pixel dimensions)
-                                largest = None
-                                largest_size = 0
-
-                                for img in imgs:
-                                    try:
-                                        width = img.get_attribute('width') or img.size['width']
-                                        height = img.get_attribute('height') or img.size['height']
-                                        width = int(width) if width else 0
-                                        height = int(height) if height else 0
-                                        size = width * height
-
-                                        if size > largest_size:
-                                            largest_size = size
-                                            largest = img
-                                    except:
-                                        continue
-
-                                if largest and largest_size > 40000:  # Minimum 200x200 pixels
-                                    full_img = largest
-                                    break
-                            except:
-                                continue
-
-                        if not full_img:
-                            print(f"    ❌ Could not find full-size image")
-                            failed_count += 1
-                            continue
-
-                        # Get the image URL
-                        img_url = full_img.get_attribute('src')
-
-                        if not img_url or img_url.startswith('data:'):
-                            print(f"    ❌ Invalid image URL")
-                            failed_count += 1
-                            continue
-
-                        # Download the image to memory first
-                        response = requests.get(img_url, timeout=30)
-
-                        if response.status_code == 200:
-                            # Calculate hash of content
-                            content_hash = hashlib.md5(response.content).hexdigest()
-                            
-                            # Determine file extension
-                            ext = '.jpg'
-                            if '.' in img_url.split('/')[-1].split('?')[0]:
-                                url_ext = img_url.split('/')[-1].split('?')[0].split('.')[-1]
-                                if url_ext.lower() in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-                                    ext = '.' + url_ext.lower()
-
-                            filename = f"{content_hash}{ext}"
-                            filepath = output_folder / filename
-
-                            # Check if hash already exists
-                            if filepath.exists() or content_hash in existing_hashes:
-                                print(f"    ⏭️  Already exists (duplicate content): {filename}")
-                                skipped_count += 1
-                                existing_hashes.add(content_hash)
-                                continue
-
-                            with open(filepath, 'wb') as f:
-                                f.write(response.content)
-
-                            # Verify file size
-                            file_size = filepath.stat().st_size
-                            if file_size < 1000:  # Less than 1KB is likely an error
-                                print(f"    ⚠️  File too small ({file_size} bytes), might be invalid")
-                                filepath.unlink()
-                                failed_count += 1
-                            else:
-                                print(f"    ✅ Downloaded ({file_size:,} bytes)")
-                                print(f"       Hash: {content_hash}")
-                                downloaded_count += 1
-                                existing_hashes.add(content_hash)
-
-                            # Random delay to avoid rate limiting
-                            time.sleep(random.uniform(1, 3))
-                        else:
-                            print(f"    ❌ Failed: HTTP {response.status_code}")
-                            failed_count += 1
-
-                    except Exception as e:
-                        print(f"    ❌ Error: {e}")
-                        failed_count += 1
-                    finally:
-                        # ALWAYS return focus to gallery window
-                        try:
-                            driver.switch_to.window(gallery_handle)
-                        except:
-                            pass
-
-                print(f"\n✓ Finished downloading batch")
-                print(f"  Downloaded this session: {downloaded_count}")
-                print(f"  Skipped (already downloaded): {skipped_count}")
-                print(f"  Failed: {failed_count}")
-
+                queue.add(new_photos)
             else:
                 no_new_photos_count += 1
                 print(f"\n⚠️  No new photos found (attempt {no_new_photos_count}/10)")
@@ -341,41 +1142,336 @@ def scrape_photos_selenium(username, output_folder, tab="by", max_scrolls=300, l
                     print(f"\n✓ No new photos after 10 scroll iterations - reached end of gallery")
                     break
 
+            # Downloads run in the background while we keep scrolling, here we only
+            # hand out new work and report on whatever has finished in the meantime
+            queue.submit()
+            if collect_results():
+                print(f"\n✓ Downloads so far")
+                print(f"  Downloaded this session: {progress.downloaded}")
+                print(f"  Skipped (already downloaded): {progress.skipped}")
+                print(f"  Failed: {progress.failed}")
+                print(f"  Still queued: {len(queue)}")
+
+            # Don't run ahead of the workers: with a full queue, let them catch
+            # up before scrolling to more photos
+            if queue.backlogged():
+                print(f"\n⏳ {len(queue)} photos queued, waiting for downloads to catch up...")
+            while queue.backlogged() and not progress.limit_reached(limit):
+                collect_results(timeout=None, first=True)
+                queue.submit()
+
             # Now scroll down slowly to load more photos
             print(f"\nScroll complete: Found {photos_on_page} total, {new_photos_count} new.")
             print(f"📜 Scrolling gallery to load more...")
 
             # Ensure gallery window is focused for scrolling
             driver.switch_to.window(gallery_handle)
-            
-            viewport_height = driver.execute_script("return window.innerHeight;")
-            scroll_increment = int(viewport_height * 0.5)  # Scroll 50% of viewport (slower)
 
-            # Do 3 small scrolls
-            for j in range(3):
-                driver.execute_script(f"window.scrollBy(0, {scroll_increment});")
-                time.sleep(1.0)  # Pause between small scrolls
+            # Do 3 small scrolls, each one waiting for new links to show up
+            # rather than pausing a fixed second
+            added = driver.execute_async_script(
+                _SCROLL_FOR_LINKS_JS, _PHOTO_LINKS_SELECTOR, 3, scroll_increment
+            )
+            print(f"   {added} new links after scrolling")
 
-            # Wait for content to load (Facebook can be slow)
-            wait_time = random.uniform(3, 6)
-            print(f"   Waiting {wait_time:.1f}s for content to load...")
-            time.sleep(wait_time)
+            # Wait for content to load (Facebook can be slow), returning as soon
+            # as the gallery stops changing rather than after a fixed delay
+            print(f"   Waiting for content to load...")
+            started = time.monotonic()
+            driver.execute_async_script(_WAIT_FOR_DOM_SETTLED_JS)
+            print(f"   Content settled after {time.monotonic() - started:.1f}s")
 
-        print(f"\n{'='*70}")
-        print(f"✅ Download complete!")
-        print(f"{'='*70}")
-        print(f"Downloaded this session: {downloaded_count}")
-        print(f"Skipped (already exist): {skipped_count}")
-        print(f"Failed: {failed_count}")
-        print(f"Total unique photos in folder: {len(existing_hashes)}")
-        print(f"Saved to: {output_folder.absolute()}")
-        print(f"\nYou can run this again with --resume to continue (skips existing files)")
-        print(f"{'='*70}")
+        # Let the workers finish the photos that are still queued
+        while queue and not progress.limit_reached(limit):
+            queue.submit()
+            collect_results(timeout=None)
+
+        print_summary(progress, existing_hashes, output_folder)
 
     finally:
-        print("\nClosing browser in 5 seconds...")
-        time.sleep(5)
-        driver.quit()
+        executor.shutdown(wait=True)
+        progress.save()
+        existing_hashes.close()
+        session.close()
+        if shared_browser:
+            # Only close our own windows, the browser stays up for other runs
+            print("\nClosing our tabs in the shared browser...")
+            for handle in filter(None, (gallery_handle, download_handle)):
+                try:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                except Exception:
+                    pass
+            driver.service.stop()
+        else:
+            print("\nClosing browser in 5 seconds...")
+            time.sleep(5)
+            driver.quit()
+
+
+async def scrape_photos_playwright(
+    username,
+    output_folder,
+    tab="by",
+    max_scrolls=300,
+    limit=None,
+    resume=False,
+    workers=6,
+):
+    """
+    Scrape full-resolution photos using Playwright's async API
+
+    Works like scrape_photos_selenium, but browser commands go over the single
+    WebSocket connection Playwright keeps to the browser, instead of one HTTP
+    request to chromedriver per command. Photo pages and images are still
+    fetched by the download workers, which the event loop awaits while it
+    keeps scrolling. Photos they can't find are opened in a second page.
+
+    Takes the same arguments as scrape_photos_selenium, apart from shared_browser.
+    """
+    try:
+        from playwright.async_api import async_playwright
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    except ImportError:
+        print("ERROR: Please install required packages:")
+        print("pip install playwright && playwright install chromium")
+        return
+
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+
+    # Get existing hashes to check for duplicates
+    existing_hashes = PhotoIndex(output_folder)
+    if existing_hashes:
+        print(f"📂 Found {len(existing_hashes)} existing photos in output folder")
+        if resume:
+            print(f"   Will skip these photos and continue downloading new ones")
+
+    # Track stats
+    progress = ScrapeProgress(existing_hashes, resume)
+
+    loop = asyncio.get_running_loop()
+    async with async_playwright() as playwright:
+        # Keep cookies in a persistent profile so later runs are already logged in
+        context = await playwright.chromium.launch_persistent_context(
+            PLAYWRIGHT_PROFILE_DIR,
+            headless=False,
+            no_viewport=True,
+            args=['--start-maximized', '--disable-blink-features=AutomationControlled'],
+        )
+        page = context.pages[0] if context.pages else await context.new_page()
+        photo_page = None
+        # Image responses of the photo page, by URL, so the photo the browser has
+        # already loaded doesn't need to be downloaded a second time
+        photo_page_images = {}
+
+        # One keep-alive session for all downloads, presenting the same user agent as the browser
+        session = create_download_session(await page.evaluate("navigator.userAgent"))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        queue = DownloadQueue(
+            executor, session, output_folder, existing_hashes, progress, limit,
+            maxsize=workers * QUEUED_PHOTOS_PER_WORKER,
+        )
+
+        try:
+            # Navigate to Facebook
+            print("Opening Facebook...")
+            await page.goto("https://www.facebook.com", wait_until='domcontentloaded')
+
+            # The c_user cookie is only set for a logged-in account, in which case the
+            # profile kept from a previous run is still logged in
+            if any(cookie['name'] == 'c_user' for cookie in await context.cookies()):
+                print("✓ Already logged in from a previous session")
+            else:
+                # Wait for manual login, reading stdin on a thread to keep the event loop free
+                await loop.run_in_executor(
+                    None,
+                    input,
+                    "\n⚠️  Please log in to Facebook in the browser window, then press ENTER here to continue...\n",
+                )
+
+            # Hand the logged-in cookies over so photo pages can be fetched without the browser
+            for cookie in await context.cookies():
+                session.cookies.set(
+                    cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path']
+                )
+
+            # Facebook keeps connections open for updates, so the page never
+            # reaches network idle. Waiting for the gallery links is what counts.
+            await page.goto(gallery_url(username, tab), wait_until='domcontentloaded')
+            try:
+                await page.wait_for_selector(_PHOTO_LINKS_SELECTOR, timeout=10000)
+            except PlaywrightTimeoutError:
+                pass
+
+            def remember_image(response):
+                if response.request.resource_type == 'image':
+                    photo_page_images[response.url] = response
+
+            async def download_in_browser(photo_key, photo_url):
+                """Find a photo's image in the browser and download it, for photos the workers couldn't"""
+                nonlocal photo_page
+                try:
+                    print(f"\n  Photo {photo_key}")
+                    print(f"    🌐 Image not found in page HTML, opening in browser...")
+                    if photo_page is None:
+                        photo_page = await context.new_page()
+                        photo_page.on('response', remember_image)
+                    photo_page_images.clear()
+                    await photo_page.goto(photo_url, wait_until='domcontentloaded')
+
+                    # Waits for the image to load, like the Selenium engine
+                    largest = await photo_page.evaluate(
+                        _playwright_function(_LARGEST_IMAGE_JS, is_async=True),
+                        [_FULL_IMAGE_SELECTORS, MIN_PHOTO_AREA],
+                    )
+                    if not largest or not largest['src'] or largest['src'].startswith('data:'):
+                        progress.fail(photo_key, "Could not find full-size image")
+                        return
+
+                    # Save the image from the response the browser already received
+                    response = photo_page_images.get(largest['src'])
+                    if response and response.ok:
+                        try:
+                            body = await response.body()
+                        except Exception:
+                            body = None
+                        if body:
+                            progress.report(photo_key, *await loop.run_in_executor(
+                                executor, save_photo, (body,), photo_extension(largest['src']),
+                                output_folder, existing_hashes,
+                            ))
+                            return
+
+                    print(f"    📥 Found image, queueing download...")
+                    queue.download((photo_key, photo_url), largest['src'])
+                except Exception as e:
+                    progress.fail(photo_key, f"Error: {e}")
+
+            async def collect_results(timeout=0, first=False):
+                """Report the photos the workers have finished, returning how many there were"""
+                if timeout == 0:
+                    results = queue.finished(0)
+                else:
+                    # Waiting blocks, so do it on a thread rather than in the event loop
+                    results = await loop.run_in_executor(None, queue.finished, timeout, first)
+
+                for (photo_key, photo_url), (status, filename, file_size) in results:
+                    if status == 'not_found':
+                        if queue.full():
+                            continue
+                        await download_in_browser(photo_key, photo_url)
+                        continue
+                    print(f"\n  Photo {photo_key}")
+                    progress.report(photo_key, status, filename, file_size)
+
+                if results:
+                    progress.save()
+                return len(results)
+
+            print(f"\n{'='*70}")
+            print(f"Starting incremental scroll & download process")
+            print(f"Max iterations: {max_scrolls}")
+            print(f"{'='*70}\n")
+
+            # The window is maximized, so the viewport height doesn't change between scrolls
+            viewport_height = await page.evaluate("window.innerHeight")
+            scroll_increment = int(viewport_height * 0.5)  # Scroll 50% of viewport (slower)
+            link_hrefs = _playwright_function(_LINK_HREFS_JS)
+            scroll_for_links = _playwright_function(_SCROLL_FOR_LINKS_JS, is_async=True)
+            wait_for_dom_settled = _playwright_function(_WAIT_FOR_DOM_SETTLED_JS, is_async=True)
+
+            no_new_photos_count = 0
+
+            for scroll_iteration in range(max_scrolls):
+                # Check if we've hit the limit
+                if progress.limit_reached(limit):
+                    print(f"\n✓ Reached download limit of {limit} photos")
+                    break
+
+                print(f"\n{'─'*70}")
+                print(f"Scroll iteration {scroll_iteration + 1}/{max_scrolls}")
+                print(f"{'─'*70}")
+
+                hrefs = await page.evaluate(link_hrefs, [_PHOTO_LINKS_SELECTOR])
+                current_photos = find_photo_links(hrefs)
+
+                # Filter out already processed or queued photos
+                new_photos = queue.new_photos(current_photos)
+
+                print(f"Photos visible on page: {len(current_photos)}")
+                print(f"New photos to check: {len(new_photos)}")
+
+                if new_photos:
+                    print(f"\n📥 Queueing {len(new_photos)} new photos for download...")
+                    no_new_photos_count = 0  # Reset counter when we find new photos
+                    queue.add(new_photos)
+                else:
+                    no_new_photos_count += 1
+                    print(f"\n⚠️  No new photos found (attempt {no_new_photos_count}/10)")
+
+                    if no_new_photos_count >= 10:
+                        print(f"\n✓ No new photos after 10 scroll iterations - reached end of gallery")
+                        break
+
+                # Downloads run in the background while we keep scrolling
+                queue.submit()
+                if await collect_results():
+                    print(f"\n✓ Downloads so far")
+                    print(f"  Downloaded this session: {progress.downloaded}")
+                    print(f"  Skipped (already downloaded): {progress.skipped}")
+                    print(f"  Failed: {progress.failed}")
+                    print(f"  Still queued: {len(queue)}")
+
+                # Don't run ahead of the workers: with a full queue, let them catch
+                # up before scrolling to more photos
+                if queue.backlogged():
+                    print(f"\n⏳ {len(queue)} photos queued, waiting for downloads to catch up...")
+                while queue.backlogged() and not progress.limit_reached(limit):
+                    await collect_results(timeout=None, first=True)
+                    queue.submit()
+
+                # Now scroll down slowly to load more photos
+                print(f"📜 Scrolling gallery to load more...")
+                added = await page.evaluate(
+                    scroll_for_links, [_PHOTO_LINKS_SELECTOR, 3, scroll_increment]
+                )
+                print(f"   {added} new links after scrolling")
+
+                # Wait for content to load, returning as soon as the gallery stops changing
+                print(f"   Waiting for content to load...")
+                started = time.monotonic()
+                await page.evaluate(wait_for_dom_settled, [])
+                print(f"   Content settled after {time.monotonic() - started:.1f}s")
+
+            # Let the workers finish the photos that are still queued
+            while queue and not progress.limit_reached(limit):
+                queue.submit()
+                await collect_results(timeout=None)
+
+            print_summary(progress, existing_hashes, output_folder)
+
+        finally:
+            executor.shutdown(wait=True)
+            progress.save()
+            existing_hashes.close()
+            session.close()
+            print("\nClosing browser...")
+            await context.close()
+
+
+def print_summary(progress, existing_hashes, output_folder):
+    print(f"\n{'='*70}")
+    print(f"✅ Download complete!")
+    print(f"{'='*70}")
+    print(f"Downloaded this session: {progress.downloaded}")
+    print(f"Skipped (already exist): {progress.skipped}")
+    print(f"Failed: {progress.failed}")
+    print(f"Total unique photos in folder: {len(existing_hashes)}")
+    print(f"Saved to: {output_folder.absolute()}")
+    print(f"\nYou can run this again with --resume to continue (skips existing files)")
+    print(f"{'='*70}")
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
@@ -410,7 +1506,36 @@ Examples:
                         help='Maximum number of photos to download (default: no limit)')
     parser.add_argument('--resume', action='store_true',
                         help='Resume from previous download (skips already processed photos)')
+    parser.add_argument('--workers', type=int, default=6,
+                        help='Number of photos to fetch in parallel (default: 6)')
+    parser.add_argument('--shared-browser', action='store_true',
+                        help=f'Share one Chrome between concurrent runs over port {SHARED_BROWSER_PORT}, '
+                             'each run working in its own tab')
+    parser.add_argument('--engine', choices=['selenium', 'playwright'], default='selenium',
+                        help='Browser automation to use (default: selenium)')
 
     args = parser.parse_args()
 
-    scrape_photos_selenium(args.username, args.output, args.tab, args.scrolls, args.limit, args.resume)
+    if args.engine == 'playwright':
+        if args.shared_browser:
+            parser.error('--shared-browser is only supported with --engine selenium')
+        asyncio.run(scrape_photos_playwright(
+            args.username,
+            args.output,
+            args.tab,
+            args.scrolls,
+            args.limit,
+            args.resume,
+            args.workers,
+        ))
+    else:
+        scrape_photos_selenium(
+            args.username,
+            args.output,
+            args.tab,
+            args.scrolls,
+            args.limit,
+            args.resume,
+            args.workers,
+            args.shared_browser,
+        )
@@ -0,0 +1,342 @@
+import os
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+
+from selenium_photos_scraper import (
+    MIN_PHOTO_BYTES,
+    DownloadQueue,
+    PhotoIndex,
+    ScrapeProgress,
+    content_hasher,
+    download_photo,
+    find_photo_links,
+    largest_image_uri,
+    photo_extension,
+    photo_id,
+    quick_content_hash,
+    save_photo,
+)
+
+
+class TestPhotoId:
+    urls = [
+        'https://www.facebook.com/photo/?fbid=10158765432101234&set=a.10150123456789012',
+        'https://www.facebook.com/photo.php?fbid=10158765432101234&set=pb.100001&type=3',
+        'https://www.facebook.com/user.profile/photos/10158765432101234/',
+        'https://www.facebook.com/user.profile/photos/pcb.10158765400000000/10158765432101234/',
+    ]
+
+    def test_all_url_forms(self):
+        for url in self.urls:
+            assert photo_id(url) == 10158765432101234, url
+
+    def test_url_without_id(self):
+        url = 'https://www.facebook.com/user.profile/photos_all'
+        assert photo_id(url) == url
+
+
+class TestFindPhotoLinks:
+    def test_dedupes_and_skips_albums(self):
+        hrefs = TestPhotoId.urls + [
+            'https://www.facebook.com/user.profile/photos/a.10150123456789012/',
+            'https://www.facebook.com/user.profile/photos/albums/?fbid=10150123456789012',
+            'https://www.facebook.com/user.profile/about',
+            None,
+            'https://www.facebook.com/photo/?fbid=10158765432109999',
+        ]
+        assert find_photo_links(hrefs) == {
+            10158765432101234: TestPhotoId.urls[0],
+            10158765432109999: 'https://www.facebook.com/photo/?fbid=10158765432109999',
+        }
+
+
+class TestLargestImageUri:
+    def test_picks_largest(self):
+        html = (
+            '{"image":{"uri":"https:\\/\\/scontent.xx.fbcdn.net\\/v\\/1_s.jpg?a=1","width":130,"height":130},'
+            '"image":{"height":1536,"uri":"https:\\/\\/scontent.xx.fbcdn.net\\/v\\/1_n.jpg?a=1","width":2048},'
+            '"image":{"uri":"https:\\/\\/static.xx.fbcdn.net\\/rsrc.png"}}'
+        )
+        assert largest_image_uri(html) == 'https://scontent.xx.fbcdn.net/v/1_n.jpg?a=1'
+
+    def test_no_image(self):
+        assert largest_image_uri('<html>Log in to Facebook</html>') is None
+
+
+class TestPhotoExtension:
+    def test_extensions(self):
+        base = 'https://scontent.fxyz1-1.fna.fbcdn.net/v/t39.30808-6/123_456_n'
+        assert photo_extension(f'{base}.jpg?stp=dst-jpg&_nc_cat=1') == '.jpg'
+        assert photo_extension(f'{base}.PNG?_nc_ht=scontent.x.fna') == '.png'
+        assert photo_extension(f'{base}.webp') == '.webp'
+        assert photo_extension(f'{base}.heic') == '.jpg'
+        assert photo_extension(f'{base}?format=.png') == '.jpg'
+        assert photo_extension(base) == '.jpg'
+
+
+class TestPhotoIndex:
+    def test_index(self, tmp_path):
+        photo = tmp_path / 'd41d8cd98f00b204e9800998ecf8427e.jpg'
+        photo.write_bytes(b'photo')
+        (tmp_path / '.hidden').write_bytes(b'')
+
+        index = PhotoIndex(tmp_path)
+        assert len(index) == 1
+        # Files are indexed by their content, whatever their name
+        assert content_hasher(b'photo').hexdigest() in index
+        assert index.find_quick(quick_content_hash(5, b'photo')) == content_hasher(b'photo').hexdigest()
+        index.add('0cc175b9c0f1b6a831c399e269772661')
+        index.close()
+
+        # Deleted photos stay known, changed ones are hashed again
+        photo.unlink()
+        (tmp_path / 'changed.jpg').write_bytes(b'changed')
+        index = PhotoIndex(tmp_path)
+        assert len(index) == 3
+        assert '0cc175b9c0f1b6a831c399e269772661' in index
+        assert content_hasher(b'changed').hexdigest() in index
+        index.close()
+
+    def test_seen_ids(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        index.add_seen([10158765432101234, 'https://www.facebook.com/photo.php?v=1'])
+        index.add_seen([10158765432101234])
+        index.close()
+
+        index = PhotoIndex(tmp_path)
+        assert sorted(index.seen_ids(), key=str) == [
+            10158765432101234, 'https://www.facebook.com/photo.php?v=1'
+        ]
+        index.close()
+
+    def test_imports_manifest(self, tmp_path):
+        (tmp_path / '.manifest').write_text(
+            '0cc175b9c0f1b6a831c399e269772661 92eb5ffee6ae2fec3ad71c777531578f\nnot-a-hash\n'
+        )
+        index = PhotoIndex(tmp_path)
+        assert '0cc175b9c0f1b6a831c399e269772661' in index
+        assert index.find_quick('92eb5ffee6ae2fec3ad71c777531578f') == '0cc175b9c0f1b6a831c399e269772661'
+        assert not (tmp_path / '.manifest').exists()
+        index.close()
+
+    def test_quick_hashes(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        index.add('0cc175b9c0f1b6a831c399e269772661', '92eb5ffee6ae2fec3ad71c777531578f')
+        index.close()
+
+        index = PhotoIndex(tmp_path)
+        assert '0cc175b9c0f1b6a831c399e269772661' in index
+        assert index.find_quick('92eb5ffee6ae2fec3ad71c777531578f') == '0cc175b9c0f1b6a831c399e269772661'
+        assert index.find_quick('4a8a08f09d37b73795649038408b5f33') is None
+        index.close()
+
+    def test_removes_stale_downloads(self, tmp_path):
+        stale = tmp_path / f'.{uuid.uuid4().hex}.part'
+        stale.write_bytes(b'partial')
+        os.utime(stale, (0, 0))
+        recent = tmp_path / f'.{uuid.uuid4().hex}.part'
+        recent.write_bytes(b'partial')
+        # Files the scraper didn't write are left alone, however old
+        user_file = tmp_path / 'holiday.part'
+        user_file.write_bytes(b'not a download')
+        os.utime(user_file, (0, 0))
+
+        PhotoIndex(tmp_path).close()
+        assert not stale.exists()
+        assert recent.exists()
+        assert user_file.exists()
+
+
+class StubExecutor:
+    """Executor whose futures are only completed by the test"""
+
+    def __init__(self):
+        self.futures = []
+        self.urls = []
+
+    def submit(self, fn, session, url, *args):
+        future = Future()
+        self.futures.append(future)
+        self.urls.append(url)
+        return future
+
+
+class FailingSession:
+    def get(self, url, **kwargs):
+        raise requests.ConnectionError('connection reset')
+
+
+class TestDownloadQueue:
+    def test_new_photos_keep_gallery_order(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        progress = ScrapeProgress(index)
+        queue = DownloadQueue(None, None, tmp_path, index, progress)
+        progress.seen_ids.add(2)
+        progress.failed_ids.add(4)
+        queue.add([(5, 'u5')])
+
+        current_photos = {key: f'u{key}' for key in [9, 2, 7, 4, 5, 1, 3]}
+        assert queue.new_photos(current_photos) == [(9, 'u9'), (7, 'u7'), (1, 'u1'), (3, 'u3')]
+        index.close()
+
+    def test_never_overshoots_limit(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        progress = ScrapeProgress(index)
+        executor = StubExecutor()
+        queue = DownloadQueue(executor, None, tmp_path, index, progress, limit=3)
+        queue.add([(key, f'u{key}') for key in range(5)])
+
+        queue.submit()
+        assert len(queue.in_flight) == 3
+        assert queue.full()
+
+        # A photo that got downloaded leaves no room for another one
+        executor.futures[0].set_result('downloaded')
+        assert [photo for photo, _ in queue.finished()] == [(0, 'u0')]
+        progress.downloaded += 1
+        queue.submit()
+        assert len(queue.in_flight) == 2
+
+        # One that failed does
+        executor.futures[1].set_result('failed')
+        queue.finished()
+        queue.submit()
+        assert len(queue.in_flight) == 2
+        assert executor.urls == ['u0', 'u1', 'u2', 'u3']
+        index.close()
+
+    def test_submits_in_order(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        executor = StubExecutor()
+        queue = DownloadQueue(executor, None, tmp_path, index, ScrapeProgress(index))
+        queue.add([(key, f'u{key}') for key in [3, 1, 2]])
+        queue.add([(0, 'u0')])
+
+        queue.submit()
+        assert executor.urls == ['u3', 'u1', 'u2', 'u0']
+        assert not queue.pending
+        index.close()
+
+    def test_backlogged_waits_for_first(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        executor = StubExecutor()
+        queue = DownloadQueue(executor, None, tmp_path, index, ScrapeProgress(index), maxsize=2)
+        queue.add([(key, f'u{key}') for key in range(3)])
+        assert not queue.backlogged()  # Nothing in progress yet
+
+        queue.submit()
+        assert queue.backlogged()
+        assert queue.finished() == []
+
+        executor.futures[1].set_result('downloaded')
+        assert queue.finished(timeout=None, first=True) == [((1, 'u1'), 'downloaded')]
+        assert 1 not in queue.queued_ids
+        assert queue.backlogged()
+
+        executor.futures[0].set_result('downloaded')
+        queue.finished(timeout=None, first=True)
+        assert len(queue) == 1
+        assert not queue.backlogged()
+        index.close()
+
+
+    def test_failed_download_is_reported(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            queue = DownloadQueue(executor, FailingSession(), tmp_path, index, ScrapeProgress(index))
+            queue.download((1, 'https://www.facebook.com/photo/?fbid=1'), 'https://x/1.jpg')
+            [(photo, (status, filename, error))] = queue.finished(timeout=None)
+        assert (photo[0], status, filename) == (1, 'error', None)
+        assert isinstance(error, requests.ConnectionError)
+        index.close()
+
+
+class StubResponse:
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+        self.headers = {'Content-Length': str(len(content))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def iter_content(self, chunk_size):
+        return (self.content[i:i + chunk_size] for i in range(0, len(self.content), chunk_size))
+
+
+class StubSession:
+    """Session serving the same content for every URL"""
+
+    def __init__(self, content):
+        self.content = content
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return StubResponse(self.content)
+
+
+class TestDownloadPhoto:
+    def test_quick_hash_match_is_confirmed(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        first_chunk = b'a' * 64 * 1024
+        known = first_chunk + b'known' * MIN_PHOTO_BYTES
+        index.add(content_hasher(known).hexdigest(), quick_content_hash(len(known), first_chunk))
+
+        session = StubSession(known)
+        status, filename, _ = download_photo(session, 'https://x/known.jpg', tmp_path, index)
+        assert status == 'duplicate'
+        assert session.requests == 1
+        assert not (tmp_path / filename).exists()
+
+        # Same size and first chunk, different content
+        other = first_chunk + b'other' * MIN_PHOTO_BYTES
+        session = StubSession(other)
+        status, filename, _ = download_photo(session, 'https://x/other.jpg', tmp_path, index)
+        assert (status, filename) == ('downloaded', f'{content_hasher(other).hexdigest()}.jpg')
+        assert session.requests == 2
+        assert (tmp_path / filename).read_bytes() == other
+        index.close()
+
+
+class TestSavePhoto:
+    def test_save_photo(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        content = b'x' * MIN_PHOTO_BYTES
+        content_hash = content_hasher(content).hexdigest()
+
+        status, filename, size = save_photo([content[:10], content[10:]], '.jpg', tmp_path, index)
+        assert (status, filename, size) == ('downloaded', f'{content_hash}.jpg', len(content))
+        assert (tmp_path / filename).read_bytes() == content
+        assert content_hash in index
+
+        # Same content under any extension is a duplicate
+        assert save_photo([content], '.png', tmp_path, index)[0] == 'duplicate'
+        assert not (tmp_path / f'{content_hash}.png').exists()
+        assert not list(tmp_path.glob('*.part'))
+        index.close()
+
+    def test_too_small(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        status, filename, size = save_photo([b'error'], '.jpg', tmp_path, index)
+        assert (status, size) == ('too_small', 5)
+        assert not (tmp_path / filename).exists()
+        assert not list(tmp_path.glob('*.part'))
+        index.close()
+
+    def test_existing_file(self, tmp_path):
+        index = PhotoIndex(tmp_path)
+        content = b'y' * MIN_PHOTO_BYTES
+        content_hash = content_hasher(content).hexdigest()
+        # Written after the index was loaded, e.g. by another run
+        (tmp_path / f'{content_hash}.jpg').write_bytes(content)
+
+        assert save_photo([content], '.jpg', tmp_path, index)[0] == 'duplicate'
+        assert content_hash in index
+        assert not list(tmp_path.glob('*.part'))
+        index.close()